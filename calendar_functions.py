@@ -1,36 +1,176 @@
 import datetime
-import pytz
 import os.path
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from zoneinfo import ZoneInfo
 
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+from googleapiclient.model import JsonModel
+from httplib2 import HttpLib2Error
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 CAL_ID = "e4268e6b257004345cf2a5b26515f9b91990398cf481d66a8835a2d26711803e@group.calendar.google.com"
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 TIMEZONE = "Europe/London"
+_TZ = ZoneInfo(TIMEZONE)
+
+# Answers accepted at a confirmation prompt; an empty answer confirms.
+CONFIRM_ANSWERS = {'y', 'yes', ''}
+
+# Retries for rate-limited (403/429) and 5xx responses. googleapiclient
+# backs off exponentially between attempts.
+NUM_RETRIES = 5
+# HTTP statuses worth retrying for a batch request or one of its parts.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Connection-level failures: socket errors, and httplib2's own errors such
+# as ServerNotFoundError on DNS failure, which do not subclass OSError.
+TRANSPORT_ERRORS = (OSError, HttpLib2Error)
+
+# The Calendar API accepts at most 50 calls per batch request.
+BATCH_SIZE = 50
+# Upper bound on batch requests sent concurrently. Kept small because all
+# batches draw on the same user's Calendar write quota.
+MAX_WORKERS = 3
+
+# Partial response for events().list: only the fields the delete flow reads.
+EVENT_LIST_FIELDS = (
+    "nextPageToken,"
+    "items(id,recurringEventId,summary,location,recurrence,start/dateTime,end/dateTime)"
+)
+
+# Treat access tokens this close to expiry as already expired.
+TOKEN_EXPIRY_MARGIN = datetime.timedelta(minutes=5)
+
+_SERVICE = None
+_CREDS = None
+
+
+class _FastJsonModel(JsonModel):
+    """JsonModel that decodes response bodies with orjson when it is installed."""
+
+    def deserialize(self, content):
+        if orjson is None:
+            return super().deserialize(content)
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    Returns True if the error is a rate limit, a transient server error or a
+    connection failure.
+    """
+    if not isinstance(error, HttpError):
+        return isinstance(error, TRANSPORT_ERRORS)
+    status = error.resp.status
+    if status == 403:
+        return b"ratelimitexceeded" in (error.content or b"").lower()
+    return status in RETRYABLE_STATUSES
+
+def _execute_with_backoff(execute):
+    """
+    Calls execute(), retrying retryable errors up to NUM_RETRIES times with
+    exponential backoff and jitter.
+    """
+    for attempt in range(NUM_RETRIES + 1):
+        try:
+            return execute()
+        except (HttpError, *TRANSPORT_ERRORS) as error:
+            if attempt == NUM_RETRIES or not _is_retryable(error):
+                raise
+        time.sleep(2 ** attempt + random.random())
+
+def _build_http(creds):
+    """
+    Returns an authorized httplib2 transport for the given credentials.
 
+    This is the same transport build() creates when given credentials=; it
+    is factored out so threads that cannot share the cached service's
+    transport can build their own.
+    """
+    return AuthorizedHttp(creds, http=build_http())
+
+def _credentials_fresh(creds) -> bool:
+    """
+    Returns True if the credentials are valid and will not expire within
+    TOKEN_EXPIRY_MARGIN.
+    """
+    if not creds or not creds.valid:
+        return False
+    if creds.expiry is None:
+        return True
+    # google-auth keeps expiry as a naive UTC datetime.
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return creds.expiry - now > TOKEN_EXPIRY_MARGIN
+
+def _save_token(creds) -> None:
+    """Persists the credentials to token.json."""
+    with open("token.json", "w") as token:
+        token.write(creds.to_json())
 
 def get_calendar_service():
-    """Builds and returns the authenticated Google Calendar API service."""
-    creds = None
-    if os.path.exists("token.json"):
+    """
+    Builds and returns the authenticated Google Calendar API service.
+
+    The service and its credentials are cached at module level. token.json
+    is only read when nothing is cached yet, and only written after the
+    credentials were actually refreshed or newly authorized.
+    """
+    global _SERVICE, _CREDS
+
+    if _SERVICE is not None and _credentials_fresh(_CREDS):
+        return _SERVICE
+
+    creds = _CREDS
+    if creds is None and os.path.exists("token.json"):
         creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
+    if not _credentials_fresh(creds):
+        if creds and creds.refresh_token:
             creds.refresh(Request())
-        else:
+            _save_token(creds)
+        elif not creds or not creds.valid:
             flow = InstalledAppFlow.from_client_secrets_file(
                 "credentials.json", SCOPES
             )
             creds = flow.run_local_server(port=0)
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
-    return build("calendar", "v3", credentials=creds)
+            _save_token(creds)
+        # Otherwise the token is still valid but inside the expiry margin and
+        # cannot be refreshed, so it is used as-is until it actually expires.
+
+    # A refresh updates the cached credentials in place, which the existing
+    # transport already holds, so the service only needs building for new ones.
+    if _SERVICE is None or creds is not _CREDS:
+        _CREDS = creds
+        _SERVICE = build(
+            "calendar",
+            "v3",
+            http=_build_http(creds),
+            model=_FastJsonModel(),
+            # Already the library default for the default discovery URL;
+            # spelled out so the bundled document is never swapped for a fetch.
+            static_discovery=True,
+            cache_discovery=False,
+        )
+    return _SERVICE
 
 def create_event(
     summary: str,
@@ -56,7 +196,7 @@ def create_event(
     """
     
     if not end_time:
-      end_time = (datetime.datetime.fromisoformat(start_time) + datetime.timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%S')
+      end_time = (datetime.datetime.fromisoformat(start_time) + datetime.timedelta(hours=1)).isoformat(timespec='seconds')
 
     proposed_action = f"""
 --- CONFIRMATION REQUIRED ---
@@ -70,22 +210,25 @@ Recurrence: {recurrence_rule or 'None'}
 
     print(proposed_action)
 
-    confirmation = input("Confirm action? (y/n): ").lower()
+    confirmation = input("Confirm action? (y/n): ").strip().lower()
 
-    if confirmation != 'y' and confirmation != '':
+    if confirmation not in CONFIRM_ANSWERS:
       return "Action cancelled by user."
 
     service = get_calendar_service()
     event_body = {
+        # Client-generated ID (base32hex) makes retried inserts idempotent:
+        # a repeat of a request the server already committed returns 409.
+        'id': uuid.uuid4().hex,
         'summary': summary,
         'location': location,
         'start': {
             'dateTime': start_time,
-            'timeZone': 'Europe/London',
+            'timeZone': TIMEZONE,
         },
         'end': {
             'dateTime': end_time,
-            'timeZone': 'Europe/London',
+            'timeZone': TIMEZONE,
         },
         'reminders': {
             'useDefault': True,
@@ -96,7 +239,13 @@ Recurrence: {recurrence_rule or 'None'}
         event_body['recurrence'] = [recurrence_rule]
 
     try:
-        event = service.events().insert(calendarId=CAL_ID, body=event_body).execute()
+        try:
+            event = service.events().insert(calendarId=CAL_ID, body=event_body).execute(num_retries=NUM_RETRIES)
+        except HttpError as error:
+            if error.resp.status != 409:
+                raise
+            # An earlier attempt created the event but its response was lost.
+            event = service.events().get(calendarId=CAL_ID, eventId=event_body['id']).execute(num_retries=NUM_RETRIES)
         return f"Event '{event.get('summary')}' successfully created. Check link: {event.get('htmlLink')}"
     except HttpError as error:
         return f"API FAILURE (HTTP {error.resp.status}): {error.content.decode()}"
@@ -113,10 +262,13 @@ def delete_event_by_id(
     """
     service = get_calendar_service()
     try:
-        service.events().delete(calendarId=CAL_ID, eventId=event_id).execute()
+        service.events().delete(calendarId=CAL_ID, eventId=event_id).execute(num_retries=NUM_RETRIES)
         print(f"Event with ID '{event_id}' has been successfully deleted.")
         return f"Event with ID '{event_id}' has been successfully deleted."
     except HttpError as error:
+        # 410 on a retried delete means an earlier attempt already removed it.
+        if error.resp.status == 410:
+            return f"Event with ID '{event_id}' has been successfully deleted."
         return f"Error deleting event with ID '{event_id}': {error}"
 
 def find_and_delete_events_by_summary(
@@ -127,62 +279,124 @@ def find_and_delete_events_by_summary(
 
     This function first identifies the master ID of any recurring events to
     delete the entire series, thereby preventing an infinite deletion loop.
+    All deletions are sent together as batch requests once confirmed.
 
     Args:
         summary_query (str): The search term used to find events (e.g., 'supo', 'meeting prep').
     """
     service = get_calendar_service()
     
-    master_ids_deleted = set()
-    events_list = []
-    
     try:
-        now = datetime.datetime.now(tz=pytz.timezone(TIMEZONE)).isoformat()
+        now = datetime.datetime.now(tz=_TZ).isoformat()
         
-        events_result = service.events().list(
-            calendarId=CAL_ID,
-            timeMin=now,
-            q=summary_query,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-
-        events_to_delete = events_result.get('items', [])
+        events_to_delete = []
+        page_token = None
+        while True:
+            events_result = service.events().list(
+                calendarId=CAL_ID,
+                timeMin=now,
+                q=summary_query,
+                singleEvents=True,
+                orderBy='startTime',
+                maxResults=2500,
+                pageToken=page_token,
+                fields=EVENT_LIST_FIELDS,
+            ).execute(num_retries=NUM_RETRIES)
+            events_to_delete.extend(events_result.get('items', []))
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                break
         
         if not events_to_delete:
             return f"No upcoming events found matching summary '{summary_query}'."
 
+        # One representative (the earliest occurrence) per event or series.
+        masters = {}
         for event in events_to_delete:
-            master_id = event.get('recurringEventId') or event.get('id')
-
-            if master_id not in master_ids_deleted:
-                events_list.append(event)
-                master_ids_deleted.add(master_id)
-
-        proposed_action = f"""
---- CONFIRMATION REQUIRED ---
-Action: - DELETE Events
-
-"""
-
-        print(event['summary'])
-        for event in events_list:
-            proposed_action += f"Summary: {event['summary']}\n"
-            proposed_action += f"Time: {event['start']['dateTime']} to {event['end']['dateTime']}\n"
-            proposed_action += f"Location: {event['location'] if 'location' in event else "None"}\n"
-            proposed_action += f"Recurrence: {event['recurrence'] if 'recurrence' in event else "None"}\n\n"
-
-        proposed_action += "----------------------------"
-
-        print(proposed_action)
-        confirmation = input("Confirm action? (y/n): ").lower()
-
-        if confirmation != 'y' and confirmation != '':
+            masters.setdefault(event.get('recurringEventId') or event['id'], event)
+
+        parts = ["\n--- CONFIRMATION REQUIRED ---\nAction: - DELETE Events"]
+        parts.extend(
+            f"Summary: {event['summary']}\n"
+            f"Time: {event['start']['dateTime']} to {event['end']['dateTime']}\n"
+            f"Location: {event.get('location', 'None')}\n"
+            f"Recurrence: {event.get('recurrence', 'None')}"
+            for event in masters.values()
+        )
+        parts.append("----------------------------")
+
+        print("\n\n".join(parts))
+        confirmation = input("Confirm action? (y/n): ").strip().lower()
+
+        if confirmation not in CONFIRM_ANSWERS:
             return "Action cancelled by user."
         
-        for event in events_list:
-            master_id = event.get('recurringEventId') or event.get('id')
-            delete_event_by_id(master_id)
+        failed = {}
+        batch_failed = {}
+
+        def _on_delete(request_id, response, exception):
+            # 410 means the event is already gone, e.g. deleted by an earlier
+            # attempt whose response was lost.
+            if exception is not None and exception.resp.status != 410:
+                failed[request_id] = exception
+
+        def _execute_batch(chunk, http=None):
+            def _send():
+                batch = service.new_batch_http_request(callback=_on_delete)
+                for master_id in chunk:
+                    batch.add(
+                        service.events().delete(calendarId=CAL_ID, eventId=master_id),
+                        request_id=master_id,
+                    )
+                batch.execute(http=http)
+
+            try:
+                _execute_with_backoff(_send)
+            except (HttpError, *TRANSPORT_ERRORS) as error:
+                # The whole batch ran out of attempts; record every ID in it so
+                # the other chunks still run and the summary stays accurate.
+                for master_id in chunk:
+                    batch_failed[master_id] = error
+
+        master_ids = list(masters)
+        chunks = [master_ids[i:i + BATCH_SIZE] for i in range(0, len(master_ids), BATCH_SIZE)]
+        if len(chunks) == 1:
+            _execute_batch(chunks[0])
+        else:
+            # httplib2 transports are not thread-safe, so each worker thread
+            # builds one and reuses it for every batch it sends.
+            worker = threading.local()
+
+            def _init_worker():
+                worker.http = _build_http(_CREDS)
+
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS, initializer=_init_worker) as executor:
+                list(executor.map(lambda chunk: _execute_batch(chunk, worker.http), chunks))
+
+        # Parts rejected with a retryable error inside an otherwise successful
+        # batch are sent again individually. Chunks that already exhausted
+        # their own backoff are not, and the fallback stops at the first ID
+        # that still fails, so an outage or spent quota is not hammered.
+        for master_id in [mid for mid, error in failed.items() if _is_retryable(error)]:
+            try:
+                service.events().delete(calendarId=CAL_ID, eventId=master_id).execute(num_retries=NUM_RETRIES)
+            except HttpError as error:
+                if error.resp.status != 410:
+                    failed[master_id] = error
+                    break
+            except TRANSPORT_ERRORS as error:
+                failed[master_id] = error
+                break
+            del failed[master_id]
+
+        failed.update(batch_failed)
+
+        if failed:
+            errors = "\n".join(f"- {event_id}: {error}" for event_id, error in failed.items())
+            return (
+                f"Deleted {len(master_ids) - len(failed)} of {len(master_ids)} events or event series "
+                f"matching '{summary_query}'. Failures:\n{errors}"
+            )
 
         return f"Successfully deleted events or event series matching '{summary_query}'."
              
@@ -199,7 +413,7 @@ def list_all_calendars() -> str:
     service = get_calendar_service()
     
     try:
-        calendars_result = service.calendarList().list().execute()
+        calendars_result = service.calendarList().list().execute(num_retries=NUM_RETRIES)
         calendars = calendars_result.get('items', [])
 
         if not calendars:
@@ -224,9 +438,8 @@ def get_current_datetime() -> str:
     localized to Europe/London. The LLM MUST use this information to resolve 
     relative time phrases like 'today', 'tomorrow', or 'next week'.
     """
-    tz = pytz.timezone(TIMEZONE)
-    now = datetime.datetime.now(tz)
-    return now.strftime("%Y-%m-%dT%H:%M:%S")
+    now = datetime.datetime.now(_TZ).replace(tzinfo=None)
+    return now.isoformat(timespec='seconds')
 
 
 if __name__ == '__main__':
@@ -1,36 +1,42 @@
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
 
-from calendar_functions import (
-    create_event,
-    find_and_delete_events_by_summary,
-    get_current_datetime,
+# The static policy comes first and the date-dependent part last, so the
+# prompt prefix stays identical across sessions.
+SYSTEM_INSTRUCTION_TEMPLATE = (
+    "You are an intelligent, helpful, and concise Calendar Agent specializing in assisting a Cambridge student with their university schedule. "
+    "Your goal is to translate requests (like creating or deleting events) into precise function calls. "
+    "You MUST parse all necessary date/time/location data from the user's input before calling 'create_event'. "
+    "When calculating dates, assume the current date and time are used as the reference point. "
+    "End time for event creation is optional. "
+    "At the end of each operation, get back to the user with confirmation or error message. "
+    "At all costs try to create events with as little information as possible (for example, don't ask for the end time if not provided, don't ask for the year because you already have it). "
+    "Current date is {now}, use this as a reference point when resolving the date from user input 'today', 'tomorrow', etc."
 )
 
 def run_chat_agent():
     """Initializes the chat loop and handles tool execution."""
     
-    try:
-        load_dotenv()
-        api_key = os.getenv("GOOGLE_API_KEY")
-        genai.configure(api_key=api_key)
-    except KeyError:
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
         print("FATAL ERROR: GOOGLE_API_KEY environment variable not set.")
         print("Please set it before running the agent.")
         return
 
-    system_instruction = (
-        "You are an intelligent, helpful, and concise Calendar Agent specializing in assisting a Cambridge student with their university schedule. "
-        "Your goal is to translate requests (like creating or deleting events) into precise function calls. "
-        "You MUST parse all necessary date/time/location data from the user's input before calling 'create_event'. "
-        f"Current date is {get_current_datetime()}, use this as a reference point when resolving the date from user input 'today', 'tomorrow', etc."
-        "When calculating dates, assume the current date and time are used as the reference point. "
-        "End time for event creation is optional"
-        "At the end of each operation, get back to the user with confirmation or error message"
-        f"At all costs try to create events with as little information as possible (for example, don't ask for the end time if not provided, don't ask for the year because you already have it ({get_current_datetime()}))"
+    # Deferred so a missing key fails fast without loading the Gemini and
+    # Google API client stacks.
+    import google.generativeai as genai
+    from calendar_functions import (
+        create_event,
+        find_and_delete_events_by_summary,
+        get_current_datetime,
     )
 
+    genai.configure(api_key=api_key)
+
+    system_instruction = SYSTEM_INSTRUCTION_TEMPLATE.format(now=get_current_datetime())
+
     model = genai.GenerativeModel('gemini-2.5-flash-lite',
     system_instruction=system_instruction,
     tools=[create_event, find_and_delete_events_by_summary])
@@ -46,7 +52,10 @@ def run_chat_agent():
             
             response = chat.send_message(user_input)
             
-            print(f"Agent: {response.text if hasattr(response, 'text') else ""}")
+            # Streaming is not used: google.generativeai rejects stream=True
+            # together with automatic function calling.
+            reply = response.text if hasattr(response, 'text') else ""
+            print(f"Agent: {reply}")
             
         except Exception as e:
             print(f"\nAn unexpected error occurred: {e}")